@@ -1,6 +1,11 @@
-import random
+import copy
+from functools import lru_cache
+
 import numpy as np
 
+# Hasta este n se decodifica con una tabla de todas las palabras de n bits (2^n filas)
+MAX_WORD_TABLE_BITS = 8
+
 class Hamming:
     def __init__(self, k: int = 4, n: int = 7):
         self.n = n
@@ -14,7 +19,13 @@ class Hamming:
 
         self._check_valid_G_H()
 
-        self.syndrome_map = self._build_syndrome_map()
+        # H^T contigua para calcular los síndromes de todos los bloques con un matmul
+        self.H_T = np.ascontiguousarray(self.H.T)
+
+        self.pow2, self.error_pos_table = self._build_error_pos_table()
+        self.flip_table = self._build_flip_table()
+        self.word_table = self._build_word_table() if n <= MAX_WORD_TABLE_BITS else None
+        self.codeword_table = self._build_codeword_table() if k <= MAX_WORD_TABLE_BITS else None
         self.data_length = 0
 
     # Verifica que n > k
@@ -26,71 +37,105 @@ class Hamming:
         product = np.dot(self.G, self.H.T) % 2
         assert np.all(product == 0)
 
-    def _get_non_zero_vectors(self, I_m: np.ndarray):
+    def _get_non_zero_vectors(self):
         """
-        Parametros:
-        I_m (np.ndarray): Matriz identidad de tamaño m x m.
-
         Retorna:
-        all_vectors: Lista de vectores columna binarios de longitud m.
-        """
-        all_vectors = []
-        for i in range(1, 2**self.m):
-            # Convertir el número (i) a su representación binaria de m bits
-            vector = []
-            temp = i
-            for _ in range(self.m):
-                vector.insert(0, temp % 2)
-                temp //= 2
-            if not vector in I_m.tolist():
-                all_vectors.append(vector)
-        return np.array(all_vectors)
+        all_vectors: Vectores binarios no nulos de longitud m que no son columnas
+                     de la identidad (peso de Hamming > 1).
+        """
+        # Todos los enteros 1..2^m-1 en binario (m bits, MSB primero) de una vez
+        values = np.arange(1, 2**self.m)
+        all_vectors = (values[:, None] >> np.arange(self.m - 1, -1, -1)) & 1
+        # Descartar las filas de la identidad (peso de Hamming 1)
+        return all_vectors[all_vectors.sum(axis=1) != 1]
 
     def _build_H(self):
         """
         Construye la matriz de paridad H para el código Hamming(n,k).
          Retorna:
-        H (np.ndarray): Matriz de paridad de tamaño mxn.
-        P (np.ndarray): Matriz de paridad de tamaño kxm.
+        H (np.ndarray): Matriz de paridad de tamaño mxn (uint8).
+        P (np.ndarray): Matriz de paridad de tamaño kxm (uint8).
         """
         I_m = np.eye(self.m, dtype=int)
-        parity_matrix = self._get_non_zero_vectors(I_m)
+        parity_matrix = self._get_non_zero_vectors()
         H = np.hstack((parity_matrix.T,I_m))
-        return H,parity_matrix
+        return H.astype(np.uint8, order='C'), parity_matrix.astype(np.uint8, order='C')
 
     def _build_G(self):
         """"
         Construye la matriz generadora G para el código Hamming(n,k).
         Retorna:
-        G (np.ndarray): Matriz generadora de tamaño kxn."""
-        return np.hstack((np.eye(self.k, dtype=int), self.P))
+        G (np.ndarray): Matriz generadora de tamaño kxn (uint8)."""
+        return np.hstack((np.eye(self.k, dtype=np.uint8), self.P)).astype(np.uint8, order='C')
 
-    def _build_syndrome_map(self):
+    def _build_error_pos_table(self):
         """
-        Construye el mapa de síndromes a posiciones de error.
+        Construye el mapa de síndromes a posiciones de error como una tabla plana,
+        indexada por el valor entero del síndrome (bits ponderados por potencias de 2).
+        El síndrome de un error en la posición col es la columna col de H.
         Retorna:
-        syndrome_map (dict): Mapa de síndromes a posiciones de error.
+        pow2 (np.ndarray): Pesos [2^(m-1), ..., 2, 1] para convertir síndromes a índices.
+        error_pos_table (np.ndarray): Tabla de tamaño 2^m con la posición de error (-1 si no hay).
         """
-        syndrome_map = {}
-        for col in range(self.n):
-            syndrome = tuple(self.H[:, col])
-            syndrome_map[syndrome] = col
-        return syndrome_map
+        pow2 = 1 << np.arange(self.m - 1, -1, -1, dtype=np.int64)
+        error_pos_table = np.full(2**self.m, -1, dtype=np.int16)
+        error_pos_table[self.H.T @ pow2] = np.arange(self.n)
+        return pow2, error_pos_table
     
+    def _build_flip_table(self):
+        """
+        Construye la máscara de corrección de cada síndrome: la fila i tiene un 1
+        en la posición del error con síndrome i (la fila 0 es todo ceros).
+        Retorna:
+        flip_table (np.ndarray): Tabla uint8 de tamaño 2^m x n.
+        """
+        flip_table = np.zeros((2**self.m, self.n), dtype=np.uint8)
+        syndromes = np.flatnonzero(self.error_pos_table >= 0)
+        flip_table[syndromes, self.error_pos_table[syndromes]] = 1
+        return flip_table
+
+    def _build_word_table(self):
+        """
+        Precalcula la decodificación de todas las palabras posibles de n bits.
+        Retorna:
+        word_pow2 (np.ndarray): Pesos para convertir una palabra recibida a su índice.
+        word_data (np.ndarray): Bits de datos corregidos de cada palabra, tamaño 2^n x k.
+        word_corrected (np.ndarray): Si la palabra requirió corrección, tamaño 2^n.
+        """
+        word_pow2 = 1 << np.arange(self.n - 1, -1, -1, dtype=np.int64)
+        words = ((np.arange(2**self.n)[:, None] >> np.arange(self.n - 1, -1, -1)) & 1).astype(np.uint8)
+
+        syndromes = ((words @ self.H_T) & 1) @ self.pow2
+        words ^= self.flip_table[syndromes]
+
+        return word_pow2, np.ascontiguousarray(words[:, :self.k]), self.error_pos_table[syndromes] >= 0
+
+    def _build_codeword_table(self):
+        """
+        Precalcula la palabra código de cada bloque de datos posible (2^k entradas).
+        Retorna:
+        data_pow2 (np.ndarray): Pesos para convertir un bloque de datos a su índice.
+        codewords (np.ndarray): Palabra código de cada bloque, tamaño 2^k x n.
+        """
+        # k <= 8: el índice cabe en uint8 y el matmul no necesita promover a int64
+        data_pow2 = (1 << np.arange(self.k - 1, -1, -1)).astype(np.uint8)
+        data = ((np.arange(2**self.k)[:, None] >> np.arange(self.k - 1, -1, -1)) & 1).astype(np.uint8)
+        return data_pow2, (data @ self.G) & 1
+
     def _apply_padding(self, data_bits):
         """
         Aplica padding a los bits de datos para que su longitud sea múltiplo de k.
         Parametros:
         data_bits (list or np.ndarray): Lista o array de bits de datos (0s y 1s).
         Retorna:
-        padded_data (np.ndarray): Bits de datos con padding aplicado.
+        padded_data (np.ndarray): Bits de datos (uint8) con padding aplicado.
         """
-        data = np.array(data_bits)
+        data = np.asarray(data_bits, dtype=np.uint8)
         remainder = len(data) % self.k
         if remainder != 0:
-            padding_length = self.k - remainder
-            padding = np.zeros(padding_length, dtype=int)
-            padded_data = np.concatenate((data, padding))
+            # Una sola reserva ya del tamaño final, en vez de concatenar
+            padded_data = np.zeros(len(data) + self.k - remainder, dtype=np.uint8)
+            padded_data[:len(data)] = data
             return padded_data
         return data
     
@@ -102,15 +147,71 @@ class Hamming:
         self.data_length = len(data_bits)
         data = self._apply_padding(data_bits)
 
-        n_blocks = len(data) // self.k
-        encoded_bits = []
+        # Todos los bloques de una vez: (n_blocks, k) @ G -> (n_blocks, n).
+        # En uint8 la suma puede desbordar, pero el desborde (mod 256) conserva la paridad.
+        blocks = data.reshape(-1, self.k)
+        encoded = np.empty((len(blocks), self.n), dtype=np.uint8)
+        if self.k == 4 and self.n == 7:
+            self._encode_7_4(blocks, encoded)
+        else:
+            np.matmul(blocks, self.G, out=encoded)
+            encoded &= 1
+        return encoded.reshape(-1)
+
+    def _encode_7_4(self, blocks, encoded):
+        """
+        Caso (7,4): con P = [[0,1,1],[1,0,1],[1,1,0],[1,1,1]] cada paridad es un XOR de
+        tres bits de datos, más barato que el matmul general. Palabra: [d0,d1,d2,d3,p0,p1,p2].
+        """
+        d0, d1, d2, d3 = blocks.T
+        d2_d3 = d2 ^ d3
+        encoded[:, :4] = blocks
+        np.bitwise_xor(d1, d2_d3, out=encoded[:, 4])
+        np.bitwise_xor(d0, d2_d3, out=encoded[:, 5])
+        np.bitwise_xor(d0 ^ d1, d3, out=encoded[:, 6])
+
+    def encode_packed(self, data_bits):
+        """
+        Codifica y entrega las palabras ya empaquetadas (8 bits por byte, MSB primero).
+        Con k pequeño cada bloque indexa directamente su palabra código en la tabla.
+        Retorna:
+        packed (np.ndarray): Bits codificados empaquetados (uint8).
+        n_bits (int): Cantidad de bits codificados (sin el relleno del último byte).
+        """
+        if self.codeword_table is None:
+            encoded = self.encode(data_bits)
+            return np.packbits(encoded), len(encoded)
+
+        self.data_length = len(data_bits)
+        blocks = self._apply_padding(data_bits).reshape(-1, self.k)
+        data_pow2, codewords = self.codeword_table
+        encoded = codewords[blocks @ data_pow2]
+        return np.packbits(encoded), encoded.size
 
-        for i in range(n_blocks):
-            block = data[i * self.k : (i + 1) * self.k]
-            # Matrix multiplication modulo 2
-            encoded_block = np.dot(block, self.G) % 2
-            encoded_bits.extend(encoded_block)
-        return np.array(encoded_bits, dtype=int)
+    def decode_words(self, blocks):
+        """
+        Decodifica y corrige una matriz de palabras recibidas.
+
+        Parámetros:
+        blocks (np.ndarray): Palabras recibidas (uint8), tamaño n_blocks x n.
+        Retorna:
+        data (np.ndarray): Bits de datos corregidos, tamaño n_blocks x k.
+        corrected (np.ndarray): Por palabra, si se corrigió un error.
+        """
+        if self.word_table is not None:
+            # Código corto: cada palabra recibida indexa directamente su decodificación
+            word_pow2, word_data, word_corrected = self.word_table
+            words = blocks @ word_pow2
+            return word_data[words], word_corrected[words]
+
+        # Síndromes de todos los bloques en una sola operación: z = r * H^T
+        syndromes = (blocks @ self.H_T) & 1
+
+        # Síndrome -> índice entero -> máscara de corrección (XOR sin ramas)
+        idx = syndromes @ self.pow2
+        corrected_blocks = blocks ^ self.flip_table[idx]
+
+        return corrected_blocks[:, :self.k], self.error_pos_table[idx] >= 0
 
     def decode(self, received_bits, data_length: int = None):
         """
@@ -122,32 +223,31 @@ class Hamming:
         data_length: (opcional) longitud original de los bits de datos antes del padding.
                      Si se proporciona, se usará para recortar el padding al final.
         """
-        received = np.array(received_bits)
+        # Sin copia si ya es uint8 (ej. bits recién desempaquetados)
+        received = np.asarray(received_bits, dtype=np.uint8)
         if len(received) % self.n != 0:
             raise ValueError(f"Received data length must be a multiple of {self.n}")
 
-        n_blocks = len(received) // self.n
-        decoded_bits = []
-        corrected_errors = 0
-
-        for i in range(n_blocks):
-            block = received[i * self.n : (i + 1) * self.n].copy()
-
-            # Calculate syndrome: z = H * r^T
-            syndrome = np.dot(self.H, block) % 2
-            syndrome_tuple = tuple(syndrome)
+        data, corrected = self.decode_words(received.reshape(-1, self.n))
+        decoded_bits = data.reshape(-1)
+        corrected_errors = int(np.count_nonzero(corrected))
 
-            if np.any(syndrome):
-                # Error detected
-                if syndrome_tuple in self.syndrome_map:
-                    error_pos = self.syndrome_map[syndrome_tuple]
-                    # Flip the bit to correct it
-                    block[error_pos] = 1 - block[error_pos]
-                    corrected_errors += 1
-
-            decoded_block = block[0:self.k]
-            decoded_bits.extend(decoded_block)
         # Deshacer el padding: usar data_length si fue proporcionado, si no usar self.data_length
         length_to_restore = data_length if data_length is not None else self.data_length
         restored_data = decoded_bits[: length_to_restore]
-        return np.array(restored_data, dtype=int), corrected_errors
+        return restored_data, corrected_errors
+
+
+@lru_cache(maxsize=8)
+def _build_hamming(k: int, n: int) -> Hamming:
+    # Construye las matrices y tablas de Hamming(n,k) una sola vez por configuración
+    return Hamming(k=k, n=n)
+
+
+def get_hamming(k: int = 4, n: int = 7) -> Hamming:
+    """
+    Retorna una instancia de Hamming(n,k) propia del llamador.
+    Las matrices y tablas (que no cambian) se comparten con la instancia en caché;
+    el estado por llamada (data_length) no, así que emisor y receptor no se pisan.
+    """
+    return copy.copy(_build_hamming(k, n))
@@ -1,64 +1,123 @@
-from collections import Counter
-import heapq
+from collections import Counter, deque
 from typing import Any, Dict, List, Tuple
 
+import numpy as np
+
 
 class _Node:
     # Nodo interno para el árbol de Huffman.
+    __slots__ = ("symbol", "freq", "left", "right")
+
     def __init__(self, symbol=None, freq: int = 0, left=None, right=None):
         self.symbol = symbol
         self.freq = freq
         self.left = left
         self.right = right
 
-    def __lt__(self, other: "_Node"):
-        return self.freq < other.freq
-
 
 def build_huffman_tree(freqs: Dict[Any, int]) -> _Node:
-    heap = [_Node(sym, freq) for sym, freq in freqs.items()]
+    # Algoritmo de dos colas: hojas ordenadas por frecuencia + nodos internos, que se
+    # generan ya en orden creciente. Tras el sort inicial cada fusión es O(1).
+    leaves = deque(sorted((_Node(sym, freq) for sym, freq in freqs.items()), key=lambda node: node.freq))
 
-    if len(heap) == 1:
-        node = heap[0]
+    if len(leaves) == 1:
+        node = leaves[0]
         return _Node(None, node.freq, node, None)
 
-    heapq.heapify(heap)
+    internals: deque = deque()
 
-    while len(heap) > 1:
-        n1 = heapq.heappop(heap)
-        n2 = heapq.heappop(heap)
-        merged = _Node(None, n1.freq + n2.freq, n1, n2)
-        heapq.heappush(heap, merged)
+    def pop_min() -> _Node:
+        # En empate se toma la hoja primero (árbol menos profundo)
+        if internals and (not leaves or internals[0].freq < leaves[0].freq):
+            return internals.popleft()
+        return leaves.popleft()
 
-    return heap[0]
+    while len(leaves) + len(internals) > 1:
+        n1 = pop_min()
+        n2 = pop_min()
+        internals.append(_Node(None, n1.freq + n2.freq, n1, n2))
 
+    return internals[0]
 
-def build_codebook(root: _Node) -> Dict[Any, str]:
-    # Genera el diccionario a partir del codebook
-    codebook: Dict[Any, str] = {}
 
-    def traverse(node: _Node, prefix: str):
+def build_code_lengths(root: _Node) -> Dict[Any, int]:
+    # Longitud del código de cada símbolo (profundidad de su hoja), recorrido iterativo
+    lengths: Dict[Any, int] = {}
+    stack = [(root, 0)]
+
+    while stack:
+        node, depth = stack.pop()
         if node.symbol is not None:
-            codebook[node.symbol] = prefix or "0"
-            return
-        traverse(node.left, prefix + "0")
+            lengths[node.symbol] = depth or 1
+            continue
         if node.right is not None:
-            traverse(node.right, prefix + "1")
+            stack.append((node.right, depth + 1))
+        stack.append((node.left, depth + 1))
+
+    return lengths
+
+
+def canonical_codebook(lengths: Dict[Any, int]) -> Dict[Any, str]:
+    # Asigna códigos canónicos: ordenados por (longitud, símbolo), valores consecutivos
+    codebook: Dict[Any, str] = {}
+    code = 0
+    prev_len = 0
+
+    try:
+        ordered = sorted(lengths.items(), key=lambda item: (item[1], item[0]))
+    except TypeError:
+        # Símbolos no comparables entre sí (ej. int y str): a igual longitud se
+        # desempata por el orden del diccionario (sort estable)
+        ordered = sorted(lengths.items(), key=lambda item: item[1])
+
+    for sym, length in ordered:
+        code <<= length - prev_len
+        codebook[sym] = format(code, f"0{length}b")
+        code += 1
+        prev_len = length
 
-    traverse(root, "")
     return codebook
 
 
+def build_codebook(root: _Node) -> Dict[Any, str]:
+    # Genera el diccionario a partir del codebook
+    return canonical_codebook(build_code_lengths(root))
+
+
+
+UNIQUE_MIN_SIZE = 4096
+
+
+def _count_symbols(data) -> Dict[Any, int]:
+    # Para arreglos grandes de enteros, np.unique cuenta en C en lugar de iterar con Counter
+    if isinstance(data, np.ndarray) or (isinstance(data, (list, tuple)) and len(data) > UNIQUE_MIN_SIZE):
+        arr = np.asarray(data)
+        if arr.ndim == 1 and arr.dtype.kind in "biu":
+            symbols, counts = np.unique(arr, return_counts=True)
+            return dict(zip(symbols.tolist(), counts.tolist()))
+    return Counter(data)
+
 
 def train_codebook(data: List[Any]) -> Dict[Any, str]:
     # Entrena el codebook de Huffman a partir de la data
-    freqs = Counter(data)
+    freqs = _count_symbols(data)
     if not freqs:
         raise ValueError("No se puede entrenar Huffman con data vacía.")
     root = build_huffman_tree(freqs)
     return build_codebook(root)
 
 
+def train_codebook_int(data) -> Dict[int, str]:
+    # Igual que train_codebook, para enteros >= 0 (ej. ADC): histograma con np.bincount
+    counts = np.bincount(np.asarray(data, dtype=np.int64))
+    symbols = np.flatnonzero(counts)
+    if len(symbols) == 0:
+        raise ValueError("No se puede entrenar Huffman con data vacía.")
+    freqs = dict(zip(symbols.tolist(), counts[symbols].tolist()))
+    root = build_huffman_tree(freqs)
+    return build_codebook(root)
+
+
 def encode(data: List[Any], codebook: Dict[Any, str]) -> str:
     # Codifica la secuencia con el codebook
     try:
@@ -69,8 +128,114 @@ def encode(data: List[Any], codebook: Dict[Any, str]) -> str:
         )
 
 
+def build_code_tables(codebook: Dict[int, str]) -> Tuple[np.ndarray, np.ndarray]:
+    # Tablas indexadas por símbolo (enteros >= 0): longitud y valor de cada código
+    max_sym = max(codebook)
+    lengths = np.zeros(max_sym + 1, dtype=np.uint8)
+    values = np.zeros(max_sym + 1, dtype=np.uint64)
+    for sym, code in codebook.items():
+        if len(code) > 64:
+            raise ValueError(f"Código de {len(code)} bits para {sym!r}, máximo 64")
+        lengths[sym] = len(code)
+        values[sym] = int(code, 2)
+    return lengths, values
+
+
+def encode_bits(data, lengths: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Codifica símbolos enteros directamente a un array de bits uint8, sin strings
+    syms = np.asarray(data, dtype=np.int64)
+
+    # Igual que encode: un símbolo fuera de la tabla o sin código es un error
+    # (si no, un índice negativo daría la vuelta y longitud 0 lo omitiría en silencio)
+    invalid = (syms < 0) | (syms >= len(lengths))
+    invalid[~invalid] = lengths[syms[~invalid]] == 0
+    if invalid.any():
+        raise ValueError(
+            f"Símbolo {int(syms[np.argmax(invalid)])!r} no está en el codebook"
+        )
+
+    L = lengths[syms].astype(np.int64)
+    total_bits = int(L.sum())
+
+    # Para cada bit de salida: índice del símbolo y posición dentro de su código
+    sym_idx = np.repeat(np.arange(len(syms)), L)
+    starts = np.cumsum(L) - L
+    pos = np.arange(total_bits) - starts[sym_idx]
+    shifts = (L[sym_idx] - 1 - pos).astype(np.uint64)
+
+    return ((values[syms][sym_idx] >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+def encode_fast(data, lengths: np.ndarray, values: np.ndarray) -> Tuple[bytes, int]:
+    # Igual que encode_bits pero empaquetado en bytes; retorna (bytes, total_bits)
+    bits = encode_bits(data, lengths, values)
+    return np.packbits(bits).tobytes(), len(bits)
+
+
+# Longitud máxima de código para usar la tabla de decodificación (2^16 entradas)
+MAX_TABLE_BITS = 16
+
+
+def build_decode_table(codebook: Dict[Any, str]) -> Tuple[List[Any], List[int], int]:
+    # Tabla indexada por los próximos max_len bits -> (símbolo, longitud del código).
+    # Se guarda como listas: el decodificador la indexa una vez por símbolo.
+    max_len = max(len(code) for code in codebook.values())
+    table_sym: List[Any] = [None] * (1 << max_len)
+    table_len = np.zeros(1 << max_len, dtype=np.int64)
+
+    for sym, code in codebook.items():
+        # Todas las entradas cuyo prefijo de len(code) bits es este código
+        shift = max_len - len(code)
+        start = int(code, 2) << shift
+        table_sym[start:start + (1 << shift)] = [sym] * (1 << shift)
+        table_len[start:start + (1 << shift)] = len(code)
+
+    return table_sym, table_len.tolist(), max_len
+
+
+def decode_bits(bits, decode_table) -> List[Any]:
+    # Decodifica un array de bits (0/1) con una búsqueda en tabla por símbolo.
+    # decode_table viene de build_decode_table y se puede reutilizar entre bloques.
+    table_sym, table_len, max_len = decode_table
+    bits = np.asarray(bits, dtype=np.uint8)
+    n = len(bits)
+
+    # Bits empaquetados (+ relleno para poder mirar max_len bits al final)
+    data = np.packbits(bits).tobytes() + bytes((max_len + 7) // 8)
+    mask = (1 << max_len) - 1
+
+    decoded: List[Any] = []
+    buf = 0       # ventana de bits pendientes (entero)
+    buf_bits = 0  # cuántos bits hay en buf
+    i = 0         # próximo byte a cargar
+    pos = 0       # bits consumidos
+
+    while pos < n:
+        while buf_bits < max_len:
+            buf = (buf << 8) | data[i]
+            i += 1
+            buf_bits += 8
+
+        idx = (buf >> (buf_bits - max_len)) & mask
+        length = table_len[idx]
+        if length == 0 or pos + length > n:
+            raise ValueError("Error de canal, no es un codigo valido")
+        decoded.append(table_sym[idx])
+
+        pos += length
+        buf_bits -= length
+        buf &= (1 << buf_bits) - 1
+
+    return decoded
+
+
 def decode(bits: str, codebook: Dict[Any, str]) -> List[Any]:
     # Decodifica la secuencia con el codebook
+    if max(len(code) for code in codebook.values()) <= MAX_TABLE_BITS:
+        bit_array = np.frombuffer(bits.encode("ascii"), dtype=np.uint8) - ord("0")
+        return decode_bits(bit_array, build_decode_table(codebook))
+
+    # Códigos muy largos: la tabla no compensa, se recorre bit a bit
     rev = {code: sym for sym, code in codebook.items()}
 
     decoded: List[Any] = []
@@ -94,20 +259,15 @@ def bits_to_bytes(bits: str) -> Tuple[bytes, int]:
         return b"", 0
 
     padding = (8 - (len(bits) % 8)) % 8
-    bits_padded = bits + "0" * padding
-
-    byte_array = bytearray()
-    for i in range(0, len(bits_padded), 8):
-        byte_chunk = bits_padded[i:i + 8]
-        byte_array.append(int(byte_chunk, 2))
-
-    return bytes(byte_array), padding
+    # '0'/'1' ASCII -> 0/1 y empaquetado en C (np.packbits rellena con ceros)
+    bit_array = np.frombuffer(bits.encode("ascii"), dtype=np.uint8) - ord("0")
+    return np.packbits(bit_array).tobytes(), padding
 
 
 def bytes_to_bits(data: bytes, padding: int) -> str:
     # Convierte de bytes a bits 
 
-    bits = "".join(f"{byte:08b}" for byte in data)
+    bit_array = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
     if padding:
-        bits = bits[:-padding]
-    return bits
\ No newline at end of file
+        bit_array = bit_array[:-padding]
+    return (bit_array + ord("0")).tobytes().decode("ascii")
@@ -1,17 +1,14 @@
 import asyncio
 import json
 import logging
-import random
 import numpy as np
 import websockets
-import serial
 from queue import Queue
 
-from Codificacion_Hamming import Hamming
-from Codificacion_Huffman import train_codebook
-from Codificacion_Huffman import encode as huf_encode
-from Codificacion_Huffman import bits_to_bytes, bytes_to_bits  # No se usan, pero se mantienen
-from Filtrado import apply_moving_average_filter, adc_to_voltage, voltage_to_adc, calculate_entropy
+from Codificacion_Hamming import get_hamming
+from Codificacion_Huffman import train_codebook_int, build_code_tables
+from Codificacion_Huffman import encode_bits as huf_encode_bits
+from Filtrado import adc_to_voltage, calculate_entropy, kl_divergence, ADC_MAX_VALUE
 
 
 # =========================================================
@@ -22,6 +19,12 @@ EMIT_Q = Queue(maxsize=50)
 def get_emit_queue():
     return EMIT_Q
 
+# Se activa cuando el servidor websocket ya está escuchando
+SERVER_READY = asyncio.Event()
+
+def get_server_ready():
+    return SERVER_READY
+
 # Slider 1: nivel del "sensor" (ADC medio)
 SENSOR_LEVEL = 520  # valor inicial
 def set_sensor_level(v: int):
@@ -52,37 +55,68 @@ ARDUINO_BAUD = 9600
 
 WINDOW = 5
 BLOCK_SIZE = 100
+BATCH = 1              # bloques por envío: >1 amortiza la serialización (a costa de latencia en el Receptor)
+BATCH_MAX_DELAY = 2.0  # s; un lote incompleto se envía igual si su bloque más antiguo supera esta espera
+                       # (≈ un bloque: BLOCK_SIZE muestras a 50 Hz)
+KL_THRESHOLD = 0.1  # bits; por encima se re-entrena el codebook de Huffman
+RNG_SEED = None     # semilla del generador aleatorio (fijarla para corridas reproducibles)
 
 HOST = "localhost"
 PORT = 8766  # 👈 IMPORTANTE: mismo puerto que tu Receptor
 
+# Código Hamming(7,4) compartido: las matrices y tablas se construyen una sola vez
+HAMMING_7_4 = get_hamming(k=4, n=7)
+
 
 # =========================================================
 # CANAL RUIDOSO (BER)
 # =========================================================
-def apply_ber(bits, ber):
+RNG = np.random.default_rng(RNG_SEED)
+
+
+def apply_ber(packed, n_bits, ber):
+    """
+    Aplica errores de canal directamente sobre bits empaquetados (8 por byte, MSB primero).
+    Solo se tocan los bytes que contienen un bit invertido.
+    """
+    packed = np.array(packed, dtype=np.uint8)
     if ber <= 0:
-        return bits
-    noisy = []
-    for b in bits:
-        if random.random() < ber:
-            noisy.append(1 - b)
-        else:
-            noisy.append(b)
-    return noisy
+        return packed
+    # Número de errores ~ Binomial(n, ber); solo se sortean sus posiciones
+    n_errors = RNG.binomial(n_bits, ber)
+    positions = RNG.choice(n_bits, size=n_errors, replace=False)
+    masks = np.right_shift(0x80, positions & 7).astype(np.uint8)
+    np.bitwise_xor.at(packed, positions >> 3, masks)
+    return packed
 
 
 # =========================================================
 # HANDLER WEBSOCKET (EMISOR)
 # =========================================================
+async def send_batch(websocket, pending, payloads):
+    # Frame JSON con los metadatos de los bloques + frame binario con sus bits Hamming
+    await websocket.send(json.dumps({"type": "batch", "blocks": pending}))
+    await websocket.send(b"".join(payloads))
+
+
 async def handle_connection(websocket):
     logging.info("Cliente conectado al EMISOR")
 
-    hamming = Hamming(k=4, n=7)
     buffer = []
+    pending = []    # metadatos JSON de los bloques aún no enviados
+    payloads = []   # bits Hamming empaquetados de esos bloques
+    pending_since = 0.0  # instante (loop.time) del bloque pendiente más antiguo
+    loop = asyncio.get_running_loop()
+
+    # Codebook de Huffman vigente: solo se re-entrena si la distribución cambia
+    codebook = None
+    trained_hist = None
+    codebook_epoch = 0
 
     arduino = None
     if USE_ARDUINO:
+        import serial  # solo hace falta con el Arduino real
+
         try:
             arduino = serial.Serial(ARDUINO_PORT, ARDUINO_BAUD, timeout=1)
             logging.info(f"Arduino conectado en {ARDUINO_PORT}")
@@ -102,6 +136,11 @@ async def handle_connection(websocket):
                     raw = arduino.readline().decode('utf-8').strip()
                     if raw.isdigit():
                         value = int(raw)
+                        # Lecturas fuera del rango del ADC (línea serie corrupta) se descartan:
+                        # los histogramas del codebook asumen símbolos en 0..ADC_MAX_VALUE
+                        if value > ADC_MAX_VALUE:
+                            logging.warning(f"Lectura ADC fuera de rango descartada: {value}")
+                            value = None
                 else:
                     await asyncio.sleep(0.001)
                     continue
@@ -114,7 +153,7 @@ async def handle_connection(websocket):
 
                 base = get_sensor_level()          # 👈 desde slider
                 slow = 90 * np.sin(2 * np.pi * 0.02 * t)
-                noise = np.random.normal(0, 8)
+                noise = RNG.normal(0, 8)
 
                 value = int(np.clip(base + slow + noise, 0, 1023))
 
@@ -134,24 +173,23 @@ async def handle_connection(websocket):
 
             entropy = calculate_entropy(block)
 
-            # 1) ADC -> Voltaje
-            volt = adc_to_voltage(block)
-
-            # 2) Filtro promedio móvil
-            filtered = apply_moving_average_filter(volt, WINDOW)
-
-            # 3) Voltaje -> ADC (símbolos)
-            filtered_adc = voltage_to_adc(filtered)
+            # Filtro promedio móvil directamente sobre enteros ADC (símbolos).
+            # Es lineal, así que equivale a ADC -> voltaje -> filtro -> ADC
+            # sin las dos conversiones en punto flotante; + WINDOW // 2 redondea.
+            # Sumas por ventana con suma acumulada: O(N) sin importar WINDOW.
+            c = np.cumsum(np.insert(block, 0, 0))
+            filtered_adc = (c[WINDOW:] - c[:-WINDOW] + WINDOW // 2) // WINDOW
 
             # ------------------------------
             # REPORTE PARA VISUALIZACIÓN
             # (lo que realmente se transmite)
             # ------------------------------
+            # Se encolan los arrays tal cual (sin tolist): la UI los copia en bloque
             try:
                 emitted_volt = adc_to_voltage(filtered_adc)
                 EMIT_Q.put_nowait({
-                    "filtered_adc": filtered_adc.tolist(),
-                    "emitted_volt": emitted_volt.tolist(),
+                    "filtered_adc": filtered_adc,
+                    "emitted_volt": emitted_volt,
                     "entropy": float(entropy),
                     "ber": get_channel_ber()
                 })
@@ -161,40 +199,66 @@ async def handle_connection(websocket):
             # ------------------------------
             # HUFFMAN
             # ------------------------------
-            fuente = filtered_adc.tolist()
-            codebook = train_codebook(fuente)
-            encoded_huffman_bits_str = huf_encode(fuente, codebook)
+            hist = np.bincount(filtered_adc, minlength=ADC_MAX_VALUE + 1)
+            new_codebook = codebook is None or kl_divergence(hist, trained_hist) > KL_THRESHOLD
+            if new_codebook:
+                codebook = train_codebook_int(filtered_adc)
+                lengths, values = build_code_tables(codebook)
+                trained_hist = hist
+                codebook_epoch += 1
+
+            huffman_bits = huf_encode_bits(filtered_adc, lengths, values)
 
             # ------------------------------
             # HAMMING
             # ------------------------------
-            bits_list = [int(x) for x in encoded_huffman_bits_str]
-            hamming_encoded_array = hamming.encode(bits_list)
+            hamming_packed, hamming_length = HAMMING_7_4.encode_packed(huffman_bits)
 
             # ------------------------------
             # CANAL RUIDOSO (BER desde slider)
             # ------------------------------
             ber = get_channel_ber()
-            hamming_noisy_list = apply_ber(hamming_encoded_array.tolist(), ber)
+            hamming_noisy = apply_ber(hamming_packed, hamming_length, ber)
 
             # ------------------------------
-            # ENVÍO
+            # ENVÍO (por lotes)
             # ------------------------------
-            message = {
+            # Los bits Hamming viajan empaquetados (8 por byte) en un frame binario
+            # que sigue al frame JSON con los metadatos de cada bloque.
+            # El codebook solo se envía cuando cambia de época.
+            block_message = {
                 "entropy": float(entropy),
-                "codebook": codebook,
-                "hamming": hamming_noisy_list,
-                "huffman_length": len(bits_list),
+                "codebook_epoch": codebook_epoch,
+                "hamming_length": hamming_length,
+                "huffman_length": len(huffman_bits),
                 "channel_ber": ber
             }
+            if new_codebook:
+                block_message["codebook"] = codebook
+            if not pending:
+                pending_since = loop.time()
+            pending.append(block_message)
+            payloads.append(hamming_noisy.tobytes())
+
+            if len(pending) < BATCH and loop.time() - pending_since < BATCH_MAX_DELAY:
+                continue
 
-            await websocket.send(json.dumps(message))
+            await send_batch(websocket, pending, payloads)
+            pending = []
+            payloads = []
 
     except websockets.exceptions.ConnectionClosedOK:
         logging.info("Cliente desconectado del EMISOR (cierre normal)")
     except Exception as e:
         logging.error(f"Error en EMISOR: {e}", exc_info=True)
     finally:
+        # Bloques que quedaron en un lote incompleto: se intenta enviarlos antes de salir
+        if pending:
+            try:
+                await send_batch(websocket, pending, payloads)
+            except Exception:
+                logging.warning(f"No se pudieron enviar {len(pending)} bloques pendientes")
+
         if arduino and arduino.is_open:
             arduino.close()
             logging.info("Puerto Arduino cerrado")
@@ -207,6 +271,7 @@ async def main():
     try:
         async with websockets.serve(handle_connection, HOST, PORT):
             logging.info(f"Servidor EMISOR listo en ws://{HOST}:{PORT}")
+            SERVER_READY.set()
             await asyncio.Future()
     except Exception as e:
         logging.error(f"Error al iniciar el servidor: {e}", exc_info=True)
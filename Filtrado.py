@@ -1,39 +1,70 @@
 import numpy as np
-from math import log2
 
 ADC_RESOLUTION_BITS = 10
 ADC_MAX_VALUE = 2**ADC_RESOLUTION_BITS - 1
 REFERENCE_VOLTAGE = 5.0
 
 def apply_moving_average_filter(data_array, window):
-    """Aplicación de filtro de promedio móvil."""
-    weights = np.ones(window) / window
-    return np.convolve(data_array, weights, mode='valid')
+    """
+    Aplicación de filtro de promedio móvil (equivale a np.convolve 'valid').
+    Usa suma acumulada: O(N) sin importar el tamaño de la ventana.
+    """
+    a = np.asarray(data_array, dtype=np.float64)
+    c = np.empty(a.size + 1, dtype=np.float64)
+    c[0] = 0.0
+    np.cumsum(a, out=c[1:])
+    return (c[window:] - c[:-window]) * (1.0 / window)
+
+# Factores de escala precalculados (float32 basta para un ADC de 10 bits)
+_ADC_SCALE = np.float32(REFERENCE_VOLTAGE / ADC_MAX_VALUE)
+_INV_ADC_SCALE = np.float32(ADC_MAX_VALUE / REFERENCE_VOLTAGE)
 
-def adc_to_voltage(raw_array):
-    """Convierte datos del ADC (0–1023) a voltaje."""
-    return (raw_array / ADC_MAX_VALUE) * REFERENCE_VOLTAGE
+def adc_to_voltage(raw_array, out=None):
+    """Convierte datos del ADC (0–1023) a voltaje (float32)."""
+    raw = np.asarray(raw_array, dtype=np.float32)
+    return np.multiply(raw, _ADC_SCALE, out=out)
 
 def voltage_to_adc(voltage_array):
-    """Convierte voltaje filtrado a valores ADC."""
-    normalized = (voltage_array / REFERENCE_VOLTAGE) * ADC_MAX_VALUE
-    return np.round(normalized).astype(int)
+    """Convierte voltaje filtrado a valores ADC (int16 cubre 0–1023)."""
+    v = np.asarray(voltage_array, dtype=np.float32)
+    return np.rint(v * _INV_ADC_SCALE).astype(np.int16)
 
 def calculate_entropy(message_array):
     """
     Calcula la entropía Shannon de un conjunto de símbolos.
     El mensaje debe ser un array de enteros (ej: datos ADC filtrados).
     """
-    if len(message_array) == 0:
+    a = np.asarray(message_array)
+    if a.size == 0:
         return 0.0
 
-    # Conteo de ocurrencias
-    values, counts = np.unique(message_array, return_counts=True)
+    # Conteo de ocurrencias: histograma lineal para enteros en el rango del ADC
+    # (memoria acotada), np.unique (ordena) para cualquier otro conjunto de símbolos
+    if np.issubdtype(a.dtype, np.integer) and a.min() >= 0 and a.max() <= ADC_MAX_VALUE:
+        counts = np.bincount(a.ravel(), minlength=ADC_MAX_VALUE + 1)
+        counts = counts[counts > 0]
+    else:
+        values, counts = np.unique(a, return_counts=True)
 
     # Probabilidades
-    probabilities = counts / len(message_array)
+    probabilities = counts / a.size
 
     # Entropía Shannon
-    entropy = -np.sum(probabilities * np.log2(probabilities))
+    entropy = -np.dot(probabilities, np.log2(probabilities))
+
+    return float(entropy)
+
+
+def kl_divergence(p_counts, q_counts):
+    """
+    Divergencia de Kullback-Leibler D(P||Q) en bits entre dos histogramas.
+    Retorna infinito si P tiene símbolos que Q no tiene.
+    """
+    p = p_counts / np.sum(p_counts)
+    q = q_counts / np.sum(q_counts)
+
+    mask = p > 0
+    if np.any(q[mask] == 0):
+        return np.inf
 
-    return entropy
+    return float(np.sum(p[mask] * np.log2(p[mask] / q[mask])))
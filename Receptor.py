@@ -5,9 +5,9 @@ import websockets
 import numpy as np
 
 # Importación de módulos de codificación y filtrado
-from Codificacion_Hamming import Hamming
-from Codificacion_Huffman import decode as huf_decode
-from Filtrado import calculate_entropy, voltage_to_adc, adc_to_voltage, ADC_RESOLUTION_BITS
+from Codificacion_Hamming import get_hamming
+from Codificacion_Huffman import build_decode_table, decode_bits as huf_decode_bits
+from Filtrado import calculate_entropy, adc_to_voltage
 from queue import Queue
 
 RECV_Q = Queue(maxsize=50)
@@ -24,116 +24,205 @@ HAMMING_K = 4
 HAMMING_N = 7
 
 
+def packed_bytes_to_bits_array(data: bytes, padding: int = 0):
+    """Convierte bytes empaquetados a un array de bits uint8, sin los bits de padding."""
+    if not data:
+        return np.empty(0, dtype=np.uint8)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+    return bits[:-padding] if padding else bits
+
+
+def process_block(message, huffman_bits_corrected_array, corrected_errors, decode_table):
+    """
+    Decodifica (Huffman) un bloque ya corregido por Hamming y lo reporta a la UI.
+    decode_table es la tabla de decodificación Huffman del codebook vigente.
+    """
+
+    # Extraer componentes del mensaje
+    entropy_sent = message.get("entropy")
+
+    logging.info(f"Mensaje recibido. Entropía reportada: {entropy_sent:.4f}")
+    logging.info(f"Tamaño de datos Hamming: {message.get('hamming_length')} bits")
+    
+    # Cadena de bits para el log: '0'/'1' en ASCII directamente desde el array uint8
+    huffman_bits_corrected_str = (huffman_bits_corrected_array + ord("0")).tobytes().decode("ascii")
+
+    logging.info(f"Errores corregidos por Hamming: {corrected_errors}")
+    logging.info(f"Bits Huffman corregidos (longitud {len(huffman_bits_corrected_str)}): {huffman_bits_corrected_str}...")
+
+    # ------------------------------
+    # 3. DECODIFICACIÓN HUFFMAN
+    # ------------------------------
+    
+    logging.info("Iniciando decodificación Huffman (Descompresión)...")
+    
+    # La tabla (próximos bits -> símbolo, longitud) se construye una vez por codebook
+    # y se decodifica directamente el array de bits corregidos.
+    
+    # Los símbolos decodificados serán enteros (valores ADC discretos)
+    try:
+        decoded_adc_values = huf_decode_bits(huffman_bits_corrected_array, decode_table)
+        
+        # Convertir la lista de símbolos (enteros) a un array de numpy
+        recovered_adc_array = np.array(decoded_adc_values, dtype=int)
+        
+    except ValueError as e:
+        logging.error(f"Error durante la decodificación Huffman: {e}. Puede ser un error de canal no corregido.")
+        return
+
+    # ----------------------------------
+    # REPORTE PARA VISUALIZACIÓN
+    # ----------------------------------
+    # Se encolan los arrays tal cual (sin tolist): la UI los copia en bloque
+    try:
+        received_volt = adc_to_voltage(recovered_adc_array)
+
+        RECV_Q.put_nowait({
+            "recovered_adc": recovered_adc_array,
+            "received_volt": received_volt,
+            "corrected_errors": corrected_errors
+        })
+    except Exception:
+        pass
+
+    
+    # ------------------------------
+    # 4. RESULTADOS Y ANÁLISIS
+    # ------------------------------
+    
+    logging.info(f"Datos ADC recuperados ({len(recovered_adc_array)} samples): {recovered_adc_array.tolist()}")
+    
+    # Calcular la entropía de los datos recuperados para comparación
+    entropy_recovered = calculate_entropy(recovered_adc_array)
+    
+    # Mostrar el resultado final
+    logging.info("--- Resumen del Bloque ---")
+    logging.info(f"Entropía reportada (Emisor): {entropy_sent:.4f}")
+    logging.info(f"Entropía de datos recuperados: {entropy_recovered:.4f}")
+    logging.info(f"Número de errores corregidos por Hamming: {corrected_errors}")
+    logging.info("--------------------------\n")
+
+
+async def read_batches(websocket, frames):
+    """
+    Productor: lee lotes del EMISOR y los deja en la cola frames.
+    Cada lote llega como un frame JSON con los metadatos de los bloques
+    seguido de un frame binario con sus bits Hamming empaquetados.
+    Al terminar (cierre o error) deja None en la cola.
+    """
+    try:
+        while True:
+            message_json = await websocket.recv()
+            batch = json.loads(message_json)
+
+            if batch.get("type") != "batch":
+                logging.warning("Mensaje incompleto o inválido recibido. Ignorando.")
+                continue
+
+            frames.put_nowait((batch, await websocket.recv()))
+    finally:
+        frames.put_nowait(None)
+
+
 async def receive_message():
     """Se conecta al servidor EMISOR, recibe los datos codificados y los decodifica."""
 
     uri = "ws://localhost:8766"
     
     # Inicializar la instancia de Hamming para la decodificación
-    hamming = Hamming(k=HAMMING_K, n=HAMMING_N)
+    hamming = get_hamming(k=HAMMING_K, n=HAMMING_N)
+
+    # Codebook vigente: el EMISOR solo lo reenvía cuando cambia de época
+    decode_table = None
+    codebook_epoch = None
 
     try:
         logging.info(f"Intentando conectar a {uri}...")
         async with websockets.connect(uri) as websocket:
             logging.info("Conexión establecida con el EMISOR.")
 
-            while True:
-                # ------------------------------
-                # 1. RECEPCIÓN DE DATOS
-                # ------------------------------
-                
-                message_json = await websocket.recv()
-                message = json.loads(message_json)
-                
-                # Extraer componentes del mensaje
-                entropy_sent = message.get("entropy")
-                codebook = message.get("codebook")
-                hamming_encoded_list = message.get("hamming")
-
-                if not codebook or not hamming_encoded_list:
-                    logging.warning("Mensaje incompleto o inválido recibido. Ignorando.")
-                    continue
-
-                logging.info(f"Mensaje recibido. Entropía reportada: {entropy_sent:.4f}")
-                logging.info(f"Tamaño de datos Hamming: {len(hamming_encoded_list)} bits")
-                logging.info(f"Diccionario de Huffman recibido: {codebook}")
-                
-                # Convertir los bits de Hamming de lista a array numpy
-                received_hamming_bits = np.array(hamming_encoded_list, dtype=int)
-                
-                # ------------------------------
-                # 2. DECODIFICACIÓN Y CORRECCIÓN HAMMING
-                # ------------------------------
-                
-                logging.info("Iniciando decodificación Hamming (Corrección de Errores)...")
-                
-                # Decodificar Hamming: devuelve los bits de Huffman y el número de errores corregidos
-                huffman_bits_corrected_array, corrected_errors = hamming.decode(
-                    received_hamming_bits, data_length=message.get("huffman_length")
-                )
-                
-                # Convertir a cadena de bits para Huffman
-                huffman_bits_corrected_str = "".join(map(str, huffman_bits_corrected_array.tolist()))
-
-                logging.info(f"Errores corregidos por Hamming: {corrected_errors}")
-                logging.info(f"Bits Huffman corregidos (longitud {len(huffman_bits_corrected_str)}): {huffman_bits_corrected_str}...")
-
-                # ------------------------------
-                # 3. DECODIFICACIÓN HUFFMAN
-                # ------------------------------
-                
-                logging.info("Iniciando decodificación Huffman (Descompresión)...")
-                
-                # Se necesita invertir el diccionario para que las claves sean strings binarias
-                # La función huf_decode del módulo Codificacion_Huffman.py ya maneja la inversión.
-                
-                # Los símbolos decodificados serán enteros (valores ADC discretos)
-                try:
-                    # El codebook recibido tiene claves de string (ej. '400') debido a json.dumps.
-                    # Debemos convertir las claves de vuelta a enteros antes de pasarlas
-                    # a la función huf_decode, ya que el EMISOR usó enteros como símbolos.
-                    codebook_int = {int(k): v for k, v in codebook.items()}
-                    
-                    decoded_adc_values = huf_decode(huffman_bits_corrected_str, codebook_int)
-                    
-                    # Convertir la lista de símbolos (enteros) a un array de numpy
-                    recovered_adc_array = np.array(decoded_adc_values, dtype=int)
-                    
-                except ValueError as e:
-                    logging.error(f"Error durante la decodificación Huffman: {e}. Puede ser un error de canal no corregido.")
-                    continue
-
-                # ----------------------------------
-                # REPORTE PARA VISUALIZACIÓN
-                # ----------------------------------
-                try:
-                    received_volt = adc_to_voltage(recovered_adc_array)
-
-                    RECV_Q.put_nowait({
-                        "recovered_adc": recovered_adc_array.tolist(),
-                        "received_volt": received_volt.tolist(),
-                        "corrected_errors": corrected_errors
-                    })
-                except Exception:
-                    pass
-
-                
-                # ------------------------------
-                # 4. RESULTADOS Y ANÁLISIS
-                # ------------------------------
-                
-                logging.info(f"Datos ADC recuperados ({len(recovered_adc_array)} samples): {recovered_adc_array.tolist()}")
-                
-                # Calcular la entropía de los datos recuperados para comparación
-                entropy_recovered = calculate_entropy(recovered_adc_array)
-                
-                # Mostrar el resultado final
-                logging.info("--- Resumen del Bloque ---")
-                logging.info(f"Entropía reportada (Emisor): {entropy_sent:.4f}")
-                logging.info(f"Entropía de datos recuperados: {entropy_recovered:.4f}")
-                logging.info(f"Número de errores corregidos por Hamming: {corrected_errors}")
-                logging.info("--------------------------\n")
-                
+            frames = asyncio.Queue()
+            reader = asyncio.create_task(read_batches(websocket, frames))
+
+            try:
+                while True:
+                    # ------------------------------
+                    # 1. RECEPCIÓN DE DATOS
+                    # ------------------------------
+                    # Se espera al menos un lote y se toman todos los que ya llegaron,
+                    # para decodificarlos juntos.
+
+                    batches = [await frames.get()]
+                    while True:
+                        try:
+                            batches.append(frames.get_nowait())
+                        except asyncio.QueueEmpty:
+                            break
+
+                    blocks = []
+                    for item in batches:
+                        if item is None:
+                            continue
+                        batch, payload = item
+
+                        # Desempaquetar los bits de Hamming de todo el lote a array numpy
+                        payload_bits = packed_bytes_to_bits_array(payload)
+                        offset = 0
+
+                        for message in batch.get("blocks", []):
+                            # Cada bloque ocupa un número entero de bytes en el payload
+                            n_bits = message.get("hamming_length", 0)
+                            received_hamming_bits = payload_bits[offset:offset + n_bits]
+                            offset += (n_bits + 7) // 8 * 8
+
+                            if "codebook" in message:
+                                # El codebook recibido tiene claves de string (ej. '400') debido a json.dumps.
+                                # Debemos convertir las claves de vuelta a enteros antes de pasarlas
+                                # a la tabla de decodificación, ya que el EMISOR usó enteros como símbolos.
+                                codebook_int = {int(k): v for k, v in message["codebook"].items()}
+                                decode_table = build_decode_table(codebook_int)
+                                codebook_epoch = message.get("codebook_epoch")
+                                logging.info(f"Diccionario de Huffman recibido (época {codebook_epoch}): {codebook_int}")
+                            elif message.get("codebook_epoch") != codebook_epoch:
+                                logging.warning("Bloque con época de codebook desconocida. Ignorando.")
+                                continue
+
+                            if decode_table is None or n_bits == 0 or n_bits % HAMMING_N != 0:
+                                logging.warning("Mensaje incompleto o inválido recibido. Ignorando.")
+                                continue
+
+                            blocks.append((message, received_hamming_bits, decode_table))
+
+                    if blocks:
+                        # ------------------------------
+                        # 2. DECODIFICACIÓN Y CORRECCIÓN HAMMING
+                        # ------------------------------
+                        # Una sola decodificación para las palabras de todos los bloques
+
+                        logging.info("Iniciando decodificación Hamming (Corrección de Errores)...")
+
+                        words = np.concatenate([bits for _, bits, _ in blocks]).reshape(-1, HAMMING_N)
+                        data, corrected = hamming.decode_words(words)
+
+                        start = 0
+                        for message, received_hamming_bits, block_table in blocks:
+                            end = start + len(received_hamming_bits) // HAMMING_N
+                            huffman_bits = data[start:end].reshape(-1)[:message.get("huffman_length")]
+                            corrected_errors = int(np.count_nonzero(corrected[start:end]))
+                            start = end
+
+                            process_block(message, huffman_bits, corrected_errors, block_table)
+
+                    if batches[-1] is None:
+                        # El productor terminó: propagar su excepción (ej. cierre de conexión)
+                        await reader
+                        break
+            finally:
+                # Si el consumidor termina antes (cancelación o error), el productor no debe
+                # quedar huérfano: se cancela y se recoge su resultado/excepción
+                reader.cancel()
+                await asyncio.gather(reader, return_exceptions=True)
+
     except websockets.exceptions.ConnectionClosedOK:
         logging.info("Conexión cerrada por el EMISOR.")
     except ConnectionRefusedError:
@@ -143,4 +232,11 @@ async def receive_message():
 
 
 if __name__ == "__main__":
+    # uvloop (opcional): event loop en C, más rápido para websockets
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(receive_message())
\ No newline at end of file
@@ -1,35 +1,52 @@
 import asyncio
-import threading
 import tkinter as tk
 
 import Emisor
 import Receptor
 from visualizador import LiveScope
 
+UI_FPS = 60
 
-def launch_ui():
+
+async def tk_pump(root):
+    # Tk corre dentro del event loop de asyncio: sin hilo aparte para la UI
+    while True:
+        try:
+            root.update()
+        except tk.TclError:
+            # Ventana cerrada
+            return
+        await asyncio.sleep(1 / UI_FPS)
+
+
+async def run_all():
+    # UI en el mismo hilo que asyncio
     root = tk.Tk()
     emit_q = Emisor.get_emit_queue()
     recv_q = Receptor.get_recv_queue()
     LiveScope(root, emit_q, recv_q, fs=50.0)
-    root.mainloop()
-
-
-async def run_all():
-    # UI en hilo
-    threading.Thread(target=launch_ui, daemon=True).start()
+    ui_task = asyncio.create_task(tk_pump(root))
 
     # Servidor emisor
     server_task = asyncio.create_task(Emisor.main())
 
-    # Espera corta para que el server quede arriba
-    await asyncio.sleep(0.4)
+    # Espera a que el server quede arriba (o a que falle al iniciar)
+    ready_task = asyncio.create_task(Emisor.get_server_ready().wait())
+    await asyncio.wait({ready_task, server_task}, return_when=asyncio.FIRST_COMPLETED)
+    ready_task.cancel()
 
     # Cliente receptor
     recv_task = asyncio.create_task(Receptor.receive_message())
 
-    await asyncio.gather(server_task, recv_task)
+    await asyncio.gather(server_task, recv_task, ui_task)
 
 
 if __name__ == "__main__":
+    # uvloop (opcional): event loop en C, más rápido para websockets
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     asyncio.run(run_all())
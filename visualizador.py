@@ -1,16 +1,106 @@
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk
-from collections import deque
-from queue import Empty
 
 import numpy as np
 import matplotlib
 matplotlib.use("TkAgg")
+from matplotlib.animation import FuncAnimation
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 import Emisor  # 👈 para controlar SENSOR_LEVEL y CHANNEL_BER
 
+TICK_MS = 150               # periodo base del refresco
+MAX_TICK_MS = 300           # periodo máximo cuando el redibujo es caro
+MIN_REDRAW_INTERVAL = 0.08  # s; por debajo se deja acumular datos para un lote mayor
+SLIDER_MS = 50              # intervalo mínimo entre cambios aplicados desde un slider
+YLIM_MARGIN = 0.1           # margen vertical (fracción del rango) al reajustar un eje
+
+
+# -------------------------
+# BUFFER CIRCULAR (numpy)
+# -------------------------
+class RingBuffer:
+    """
+    Buffer circular de tamaño fijo sobre un array de numpy: escrituras en bloque
+    (a lo sumo dos asignaciones por slice) y lectura como array sin pasar por listas.
+    """
+
+    def __init__(self, size, dtype=np.float64):
+        self._buf = np.empty(size, dtype=dtype)
+        self._head = 0   # próxima posición a escribir
+        self._count = 0  # muestras válidas (<= size)
+
+    def __len__(self):
+        return self._count
+
+    def extend(self, values):
+        size = len(self._buf)
+        values = values[-size:]
+        k = len(values)
+        first = min(k, size - self._head)
+        self._buf[self._head:self._head + first] = values[:first]
+        self._buf[:k - first] = values[first:]
+        self._head = (self._head + k) % size
+        self._count = min(self._count + k, size)
+
+    def view(self):
+        # Muestras en orden cronológico: vista directa salvo que el buffer haya dado la vuelta
+        if self._count < len(self._buf) or self._head == 0:
+            return self._buf[:self._count]
+        return np.concatenate((self._buf[self._head:], self._buf[:self._head]))
+
+
+def _drain_volts(q, key):
+    """
+    Vacía la cola q tomando su lock una sola vez (no un get_nowait por mensaje).
+    Retorna los voltajes de todos los reportes concatenados, o None si no había ninguno.
+    """
+    with q.mutex:
+        reports = list(q.queue)
+        q.queue.clear()
+        q.not_full.notify_all()
+
+    if not reports:
+        return None
+    return np.concatenate([rep.get(key, ()) for rep in reports], dtype=np.float64)
+
+
+def _minmax_decimate(x, y, target_px):
+    """
+    Reduce una serie a un par (mín, máx) por columna de píxel, si tiene más de 2 puntos
+    por columna: el trazo se ve igual y la línea tiene muchos menos vértices.
+    Se descartan las muestras más antiguas que no completan una columna.
+    """
+    n = len(y)
+    if n <= 2 * target_px:
+        return x, y
+    per = n // target_px
+    start = n - per * target_px
+
+    cols = y[start:].reshape(target_px, per)
+    y_out = np.empty((target_px, 2), dtype=y.dtype)
+    np.min(cols, axis=1, out=y_out[:, 0])
+    np.max(cols, axis=1, out=y_out[:, 1])
+    # Ambos puntos en el centro de la columna: un trazo vertical de mín a máx
+    x_out = np.repeat(x[start:n:per] + (per - 1) / 2, 2)
+    return x_out, y_out.reshape(-1)
+
+
+def _next_fast_len(n):
+    # Menor longitud >= n cuyos únicos factores primos son 2, 3 y 5 (rápida para pocketfft)
+    m = n
+    while True:
+        k = m
+        for p in (2, 3, 5):
+            while k % p == 0:
+                k //= p
+        if k == 1:
+            return m
+        m += 1
+
 
 class LiveScope:
     def __init__(self, root, emit_q, recv_q, fs=50.0, max_samples=600):
@@ -20,11 +110,37 @@ class LiveScope:
         self.fs = fs
 
         self.max_samples = max_samples
-        self.emitted = deque(maxlen=max_samples)
-        self.received = deque(maxlen=max_samples)
+        self._emitted = RingBuffer(max_samples)
+        self._received = RingBuffer(max_samples)
+        self._emit_dirty = False  # hay datos nuevos sin graficar
+        self._recv_dirty = False
+        self._sample_idx = np.arange(max_samples)
+
+        # Por largo de señal: largo de la FFT, eje de frecuencias y ventana de Hann
+        # (fs es fijo: se calculan una vez por largo)
+        self._fft_cache = {}
+        self._fft_enabled = True
+        self._fft_work = np.zeros((2, _next_fast_len(max_samples)), dtype=np.float64)  # una fila por lado
+
+        # Último resultado listo para graficar, publicado por el hilo de trabajo
+        self._latest = {}
+        self._latest_lock = threading.Lock()
+
+        self._last_draw = 0.0
+        self._tick_ms = TICK_MS
+
+        # after() pendiente de cada slider (None si no hay)
+        self._sensor_job = None
+        self._ber_job = None
 
         self._build_ui()
-        self._tick()
+        threading.Thread(target=self._fft_worker, daemon=True).start()
+
+        # matplotlib agenda los cuadros y con blit solo repinta las líneas, no los ejes
+        self._ani = None
+        self._ani = FuncAnimation(
+            self.fig, self._update_artists, interval=TICK_MS, blit=True, cache_frame_data=False
+        )
 
     def _build_ui(self):
         self.root.title("Monitor Voltajes + FFT (Emisor vs Receptor)")
@@ -79,6 +195,14 @@ class LiveScope:
         )
         tip.grid(row=2, column=0, columnspan=4, sticky="w", pady=(8, 0))
 
+        # Checkbox FFT: apagada no se calcula ni se dibuja el espectro
+        self.show_fft = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            controls, text="Mostrar FFT",
+            variable=self.show_fft,
+            command=self._on_fft_toggle
+        ).grid(row=3, column=0, sticky="w", pady=(8, 0))
+
         # -------------------------
         # PANEL DE GRÁFICAS
         # -------------------------
@@ -94,111 +218,233 @@ class LiveScope:
 
         self.ax_e.set_title("Voltajes emitidos (filtrados)")
         self.ax_r.set_title("Voltajes recibidos (reconstruidos)")
-        self.ax_fe.set_title("FFT voltajes emitidos")
-        self.ax_fr.set_title("FFT voltajes recibidos")
+        self.ax_fe.set_title("FFT voltajes emitidos (potencia)")
+        self.ax_fr.set_title("FFT voltajes recibidos (potencia)")
+
+        # Líneas persistentes: cada tick solo cambia sus datos (set_data)
+        self.line_e, = self.ax_e.plot([], [])
+        self.line_r, = self.ax_r.plot([], [])
+        self.line_fe, = self.ax_fe.plot([], [])
+        self.line_fr, = self.ax_fr.plot([], [])
+        self._lines = [self.line_e, self.line_r, self.line_fe, self.line_fr]
+
+        # Eje x fijo (muestras del buffer / hasta Nyquist): con blit el fondo no se
+        # vuelve a dibujar en cada cuadro, así que los límites solo cambian si hace falta
+        self.ax_e.set_xlim(0, self.max_samples)
+        self.ax_r.set_xlim(0, self.max_samples)
+        self.ax_fe.set_xlim(0, self.fs / 2)
+        self.ax_fr.set_xlim(0, self.fs / 2)
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=frame)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
+        # Ancho en píxeles de las gráficas temporales (para diezmar); se actualiza al redimensionar
+        self._on_resize()
+        self.canvas.mpl_connect("resize_event", self._on_resize)
+
         self.status = ttk.Label(main, text="Esperando datos...")
         self.status.pack(anchor="w", pady=(6, 0))
 
+    def _on_fft_toggle(self):
+        # El hilo de trabajo lee este bool (las variables de Tk solo se usan en el hilo de Tk)
+        self._fft_enabled = bool(self.show_fft.get())
+        for ax, line in ((self.ax_fe, self.line_fe), (self.ax_fr, self.line_fr)):
+            ax.set_visible(self._fft_enabled)
+            line.set_visible(self._fft_enabled)
+        self.canvas.draw_idle()
+
+    def _on_resize(self, _=None):
+        self._plot_px = max(1, int(self.ax_e.bbox.width))
+
     # -------------------------
     # CALLBACKS SLIDERS
     # -------------------------
+    # Un arrastre dispara decenas de eventos por segundo: se aplica como máximo uno cada
+    # SLIDER_MS, leyendo el valor del slider al momento de aplicarlo (siempre el último).
     def _on_sensor_change(self, _=None):
+        if self._sensor_job is None:
+            self._sensor_job = self.root.after(SLIDER_MS, self._apply_sensor)
+
+    def _apply_sensor(self):
+        self._sensor_job = None
         v = int(self.sensor_var.get())
         Emisor.set_sensor_level(v)
         self.sensor_label.config(text=f"{v} ADC")
 
     def _on_ber_change(self, _=None):
+        if self._ber_job is None:
+            self._ber_job = self.root.after(SLIDER_MS, self._apply_ber)
+
+    def _apply_ber(self):
+        self._ber_job = None
         v = float(self.ber_var.get())
         Emisor.set_channel_ber(v)
         self.ber_label.config(text=f"{v:.3f}")
 
     # -------------------------
-    # CONSUMO DE COLAS
+    # HILO DE TRABAJO: COLAS + FFT
     # -------------------------
-    def _consume(self):
-        updated = False
-
-        # leer emisor
+    def _fft_worker(self):
+        # Vacía las colas y calcula las FFT fuera del hilo de Tk; la UI solo grafica
         while True:
-            try:
-                rep = self.emit_q.get_nowait()
-            except Empty:
-                break
+            if self._consume():
+                results = self._compute()
+                with self._latest_lock:
+                    self._latest.update(results)
+            time.sleep(MIN_REDRAW_INTERVAL)
+
+    def _compute(self):
+        """
+        Prepara, para cada lado con datos nuevos, la señal (diezmada al ancho del eje)
+        y su espectro.
+        Retorna: dict lado -> (x, señal, frecuencias, potencia); frecuencias/potencia
+        son None si aún no hay muestras suficientes para la FFT.
+        """
+        signals = {}
+        # Copia propia de la señal: el buffer circular se sigue escribiendo en este hilo
+        if self._emit_dirty:
+            signals["emit"] = np.array(self._emitted.view())
+            self._emit_dirty = False
+
+        if self._recv_dirty:
+            signals["recv"] = np.array(self._received.view())
+            self._recv_dirty = False
+
+        if self._fft_enabled:
+            spectra = self._spectra(signals)
+        else:
+            spectra = {side: (None, None) for side in signals}
+
+        results = {}
+        for side, signal in signals.items():
+            x, y = _minmax_decimate(self._sample_idx[:len(signal)], signal, self._plot_px)
+            results[side] = (x, y, *spectra[side])
+        return results
 
-            v = rep.get("emitted_volt", [])
-            for x in v:
-                self.emitted.append(float(x))
-            updated = True
+    def _consume(self):
+        # leer emisor
+        v = _drain_volts(self.emit_q, "emitted_volt")
+        if v is not None:
+            self._emitted.extend(v)
+            self._emit_dirty = True
 
         # leer receptor
-        while True:
-            try:
-                rep = self.recv_q.get_nowait()
-            except Empty:
-                break
-
-            v = rep.get("received_volt", [])
-            for x in v:
-                self.received.append(float(x))
-            updated = True
+        v = _drain_volts(self.recv_q, "received_volt")
+        if v is not None:
+            self._received.extend(v)
+            self._recv_dirty = True
 
-        return updated
+        return self._emit_dirty or self._recv_dirty
 
     # -------------------------
     # FFT
     # -------------------------
-    def _fft_mag(self, x):
-        if len(x) < 8:
-            return None, None
-        arr = np.array(x, dtype=float)
-        arr = arr - np.mean(arr)
-        N = len(arr)
-
-        X = np.fft.rfft(arr)
-        f = np.fft.rfftfreq(N, d=1 / self.fs)
-        mag = np.abs(X)
-        return f, mag
+    def _spectra(self, signals):
+        """
+        Espectro de potencia de cada señal (dict lado -> señal).
+        Las señales del mismo largo (lo normal con los buffers llenos) se transforman
+        juntas en una sola rfft 2-D.
+        Retorna: dict lado -> (frecuencias, potencia), o (None, None) si hay pocas muestras.
+        """
+        spectra = {side: (None, None) for side in signals}
+
+        by_length = {}
+        for side, signal in signals.items():
+            if len(signal) >= 8:
+                by_length.setdefault(len(signal), []).append(side)
+
+        for sides in by_length.values():
+            f, power = self._fft_power([signals[side] for side in sides])
+            for side, row in zip(sides, power):
+                spectra[side] = (f, row)
+        return spectra
+
+    def _fft_power(self, rows):
+        # rows: señales del mismo largo N; retorna el eje de frecuencias y una fila de potencia por señal
+        n_rows = len(rows)
+        N = len(rows[0])
+
+        cached = self._fft_cache.get(N)
+        if cached is None:
+            # Relleno con ceros hasta una longitud 5-suave: evita los caminos lentos de largos primos
+            M = _next_fast_len(N)
+            cached = self._fft_cache[N] = (M, np.fft.rfftfreq(M, d=1 / self.fs), np.hanning(N))
+        M, f, window = cached
+
+        # Arreglo de trabajo persistente: señal sin media, con ventana de Hann (reduce la
+        # fuga espectral de cortar la señal en N muestras) y ceros de relleno hasta M
+        work = self._fft_work[:n_rows, :M]
+        for i, x in enumerate(rows):
+            np.subtract(x, np.mean(x), out=work[i, :N])
+        work[:, :N] *= window
+        work[:, N:] = 0.0
+
+        X = np.fft.rfft(work, axis=1)
+        # Espectro de potencia |X|^2: igual de útil para visualizar y sin la raíz de np.abs
+        power = np.square(X.real)
+        power += np.square(X.imag)
+        return f, power
 
     # -------------------------
     # REDRAW
     # -------------------------
-    def _redraw(self):
-        self.ax_e.clear()
-        self.ax_r.clear()
-        self.ax_fe.clear()
-        self.ax_fr.clear()
-
-        self.ax_e.set_title("Voltajes emitidos (filtrados)")
-        self.ax_r.set_title("Voltajes recibidos (reconstruidos)")
-        self.ax_fe.set_title("FFT voltajes emitidos")
-        self.ax_fr.set_title("FFT voltajes recibidos")
-
-        if self.emitted:
-            self.ax_e.plot(list(self.emitted))
-
-        if self.received:
-            self.ax_r.plot(list(self.received))
-
-        fe, me = self._fft_mag(self.emitted)
-        if fe is not None:
-            self.ax_fe.plot(fe, me)
-
-        fr, mr = self._fft_mag(self.received)
-        if fr is not None:
-            self.ax_fr.plot(fr, mr)
-
-        self.canvas.draw_idle()
+    def _set_line(self, ax, line, x, y):
+        """
+        Actualiza los datos de la línea existente (sin recrear artistas).
+        El eje y solo se reajusta si los datos se salen del rango o ocupan menos de la
+        mitad; retorna True en ese caso (el fondo de los ejes debe redibujarse).
+        """
+        line.set_data(x, y)
+
+        lo, hi = ax.get_ylim()
+        y_min, y_max = float(np.min(y)), float(np.max(y))
+        if y_min >= lo and y_max <= hi and (y_max - y_min) >= 0.5 * (hi - lo):
+            return False
+        margin = YLIM_MARGIN * (y_max - y_min) or 1.0
+        ax.set_ylim(y_min - margin, y_max + margin)
+        return True
+
+    def _redraw(self, latest):
+        # Solo se actualiza el lado que recibió datos nuevos
+        rescaled = False
+        if "emit" in latest:
+            xe, emitted, fe, me = latest["emit"]
+            if len(emitted):
+                rescaled |= self._set_line(self.ax_e, self.line_e, xe, emitted)
+            if fe is not None:
+                rescaled |= self._set_line(self.ax_fe, self.line_fe, fe, me)
+
+        if "recv" in latest:
+            xr, received, fr, mr = latest["recv"]
+            if len(received):
+                rescaled |= self._set_line(self.ax_r, self.line_r, xr, received)
+            if fr is not None:
+                rescaled |= self._set_line(self.ax_fr, self.line_fr, fr, mr)
+
+        if rescaled:
+            # Cambiaron los límites: se redibuja la figura completa (ejes y ticks nuevos);
+            # FuncAnimation toma ese fondo para los siguientes blits
+            self.canvas.draw()
 
         self.status.config(
-            text=f"Muestras | Emisor: {len(self.emitted)} | Receptor: {len(self.received)} | "
+            text=f"Muestras | Emisor: {len(self._emitted)} | Receptor: {len(self._received)} | "
                  f"Fs≈{self.fs} Hz | Sensor={Emisor.get_sensor_level()} | BER={Emisor.get_channel_ber():.3f}"
         )
 
-    def _tick(self):
-        if self._consume():
-            self._redraw()
-        self.root.after(150, self._tick)
+    def _update_artists(self, _frame):
+        now = time.monotonic()
+        latest = None
+        if now - self._last_draw >= MIN_REDRAW_INTERVAL:
+            with self._latest_lock:
+                latest, self._latest = self._latest, {}
+        if latest:
+            start = time.perf_counter()
+            self._redraw(latest)
+            draw_ms = (time.perf_counter() - start) * 1000
+            self._last_draw = now
+            # Si redibujar se vuelve caro, se espacian los cuadros (hasta MAX_TICK_MS)
+            self._tick_ms = int(min(MAX_TICK_MS, max(TICK_MS, 2 * draw_ms)))
+            if self._ani is not None:
+                self._ani.event_source.interval = self._tick_ms
+        # Con blit se devuelven siempre las líneas visibles (aunque no cambien)
+        return self._lines if self._fft_enabled else self._lines[:2]